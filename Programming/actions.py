@@ -0,0 +1,195 @@
+# Actions a detected Movement triggers on the hand, and the queue that runs them without blocking
+#
+# an action is compiled once against the hand into a tuple of (offset_ms, command) steps,
+# dispatching a movement then only pushes those steps onto the CommandQueue which the
+# control loop services between sensor reads
+
+import time
+
+
+class CommandQueue:
+    '''
+    commands waiting for their due time, kept sorted so servicing only looks at the head
+    '''
+    MAXIMUM_PENDING = 64
+    def __init__(self):
+        self.pending = []  # [due_ms, command] ordered by due time
+        self.dropped = 0
+
+    def push(self, delay_ms: int, command):
+        if len(self.pending) >= self.MAXIMUM_PENDING:
+            self.dropped += 1
+            return
+
+        due = time.ticks_add(time.ticks_ms(), delay_ms)
+        ind = len(self.pending)
+        while ind and time.ticks_diff(self.pending[ind-1][0], due) > 0:
+            ind -= 1
+        self.pending.insert(ind, (due, command))
+
+    def service(self) -> int:
+        '''
+        runs every command that is due, returns how many ran
+        '''
+        ran = 0
+        now = time.ticks_ms()
+        while self.pending and time.ticks_diff(now, self.pending[0][0]) >= 0:
+            self.pending.pop(0)[1]()
+            ran += 1
+        return ran
+
+    def idle(self, ms: int, background=None):
+        '''
+        services the queue for `ms` milliseconds, a drop in for time.sleep_ms in the control loop
+        `background` is called on every pass as well, for other non-blocking work of the loop
+        '''
+        deadline = time.ticks_add(time.ticks_ms(), ms)
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            self.service()
+            if background is not None:
+                background()
+        self.service()
+
+
+class Action:
+    '''
+    base of every action, subclasses check their parameters against the hand in `compile`
+    and return the steps to run
+    '''
+    def compile(self, hand) -> tuple:
+        raise NotImplementedError
+
+    @staticmethod
+    def _check_finger(hand, finger: int):
+        if not 0 <= finger < len(hand.fingers):
+            raise ValueError(f"finger {finger} does not exist, hand has {len(hand.fingers)} fingers")
+
+    @staticmethod
+    def _check_degree(hand, finger: int, degree):
+        finger = hand.fingers[finger]
+        if not finger.MINIMUM_DEGREE <= degree <= finger.MAXIMUM_DEGREE:
+            raise ValueError(f"{degree} degrees is outside {finger.MINIMUM_DEGREE}-{finger.MAXIMUM_DEGREE}")
+
+
+class FingerPose(Action):
+    '''
+    moves one finger to `degree`
+    '''
+    def __init__(self, finger: int, degree):
+        self.finger = finger
+        self.degree = degree
+
+    def compile(self, hand) -> tuple:
+        self._check_finger(hand, self.finger)
+        self._check_degree(hand, self.finger, self.degree)
+
+        finger = hand.fingers[self.finger]
+        degree = self.degree
+        def command():
+            finger.contraction_value = degree
+        return ((0, command),)
+
+
+class FingerToggle(Action):
+    '''
+    fully contracts a relaxed finger and relaxes a contracted one
+    '''
+    def __init__(self, finger: int):
+        self.finger = finger
+
+    def compile(self, hand) -> tuple:
+        self._check_finger(hand, self.finger)
+        return ((0, hand.fingers[self.finger].contraction_toggle),)
+
+
+class GripPreset(Action):
+    '''
+    moves every finger at once, a None degree leaves that finger where it is
+    '''
+    def __init__(self, degrees: tuple):
+        self.degrees = degrees
+
+    def compile(self, hand) -> tuple:
+        if len(self.degrees) != len(hand.fingers):
+            raise ValueError(f"grip needs {len(hand.fingers)} degrees, got {len(self.degrees)}")
+
+        steps = []
+        for ind, degree in enumerate(self.degrees):
+            if degree is not None:
+                steps.extend(FingerPose(ind, degree).compile(hand))
+        return tuple(steps)
+
+
+class Sequence(Action):
+    '''
+    runs actions one after the other, `interval_ms` apart
+    '''
+    def __init__(self, actions: tuple, interval_ms: int):
+        self.actions = actions
+        self.interval_ms = interval_ms
+
+    def compile(self, hand) -> tuple:
+        if self.interval_ms < 0:
+            raise ValueError("interval_ms can't be negative")
+
+        steps = []
+        for ind, action in enumerate(self.actions):
+            for offset, command in action.compile(hand):
+                steps.append((ind*self.interval_ms + offset, command))
+        return tuple(steps)
+
+
+class Callback(Action):
+    '''
+    calls `function(hand)`, for anything the other actions can't describe
+    '''
+    def __init__(self, function):
+        self.function = function
+
+    def compile(self, hand) -> tuple:
+        if not callable(self.function):
+            raise ValueError(f"{self.function} is not callable")
+
+        function = self.function
+        return ((0, lambda: function(hand)),)
+
+
+# grip presets in degrees from finger 1 to 5, the hand's fingers go from 0 (relaxed) to 120
+GRIP_OPEN = GripPreset((0, 0, 0, 0, 0))
+GRIP_FIST = GripPreset((120, 120, 120, 120, 120))
+GRIP_PINCH = GripPreset((120, 120, 0, 0, 0))
+GRIP_POINT = GripPreset((120, 0, 120, 120, 120))
+
+
+class ActionDispatcher:
+    '''
+    maps every Movement to an Action
+
+    bindings are compiled into a tuple indexed like the movements list MuscleSensor reports,
+    so every action is validated at load time and a dispatch is one index plus queue pushes
+    '''
+    def __init__(self, hand, movements: list, bindings: tuple, queue: CommandQueue=None):
+        self.queue = CommandQueue() if queue is None else queue
+
+        table = [None] * len(movements)
+        for movement, action in bindings:
+            ind = None
+            for n, known_movement in enumerate(movements):
+                if known_movement is movement:
+                    ind = n
+            if ind is None:
+                raise ValueError("bound movement is not one of the movements the sensor detects")
+            table[ind] = action.compile(hand)
+        self.table = tuple(table)
+
+    def dispatch(self, movement_ind: int) -> bool:
+        '''
+        queues the detected movement's action, returns False if the movement has none
+        '''
+        steps = self.table[movement_ind]
+        if steps is None:
+            return False
+
+        for offset, command in steps:
+            self.queue.push(offset, command)
+        return True
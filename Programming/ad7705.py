@@ -69,6 +69,7 @@ class AD770X():
         self.spi = SoftSPI(baudrate=SPEED, polarity=1, phase=1, sck=Pin(6), mosi=Pin(3), miso=Pin(0))
         self.CS = Pin(7, Pin.OUT)
 
+        self._result = bytearray(2)
         self.initChannel(CHN_AIN1)
 
     def initChannel(self, channel,clkDivider=CLK_DIV_1, polarity=BIPOLAR, gain=GAIN_1, updRate=UPDATE_RATE_25):
@@ -113,7 +114,7 @@ class AD770X():
         self.spi.write(r)
 
     def readADResult(self) :
-        buf = bytearray(2)
+        buf = self._result  # reused, a read no longer allocates
         self.spi.readinto(buf, 0x00)
 
         r = int(buf[0] << 8 | buf[1])
@@ -0,0 +1,387 @@
+# Benchmarks that run on the board or the micropython unix port
+# open repl, `import benchmark` then `benchmark.display_bus()`, `benchmark.classifier_replay()`,
+# `benchmark.dispatch_latency()`, `benchmark.proportional_tracking()` or `benchmark.native_calls()`
+# `benchmark.boot_time()` needs the board
+
+import sys
+import time
+import random
+import ssd1306
+import gesture
+import actions
+import math
+import proportional
+
+from gesture import Movement, MuscleIntensity
+
+# the movements of the hand in muscle_sensor.py, which drives the servos as soon as it is imported
+MOVEMENTS = (
+    Movement((MuscleIntensity.LOW, MuscleIntensity.NONE, MuscleIntensity.NONE), (0, 1, 2)),
+    Movement((MuscleIntensity.LOW, MuscleIntensity.LOW, MuscleIntensity.NONE), (0, 1, 2)),
+    Movement((MuscleIntensity.LOW, MuscleIntensity.NONE, MuscleIntensity.LOW), (0, 1, 2)),
+    Movement((MuscleIntensity.LOW, MuscleIntensity.LOW, MuscleIntensity.LOW), (0, 1, 2)),
+    Movement((MuscleIntensity.MEDIUM, MuscleIntensity.NONE, MuscleIntensity.NONE), (0, 1, 2)),
+    Movement((MuscleIntensity.MEDIUM, MuscleIntensity.LOW, MuscleIntensity.NONE), (0, 1, 2)),  # full palm
+)
+
+class RecordingI2C:
+    '''
+    fake I2C bus that records every transaction instead of driving pins
+    '''
+    def __init__(self, freq=ssd1306.I2C_FREQ_FAST):
+        self.freq = freq
+        self.reset()
+
+    def reset(self):
+        self.transactions = 0
+        self.bytes_on_bus = 0
+
+    def writeto(self, addr, buf):
+        self.transactions += 1
+        self.bytes_on_bus += 1 + len(buf)  # address byte + payload
+        return len(buf)
+
+    def writevto(self, addr, bufs):
+        self.transactions += 1
+        self.bytes_on_bus += 1
+        for buf in bufs:
+            self.bytes_on_bus += len(buf)
+
+    def bus_time_us(self):
+        '''
+        time the recorded traffic would take on a real bus: 9 clocks per byte (8 bits + ack)
+        '''
+        return self.bytes_on_bus * 9 * 1000000 // self.freq
+
+
+class UnbatchedSSD1306_I2C(ssd1306.SSD1306_I2C):
+    '''
+    the driver as it was before batching, one I2C write per command byte
+    '''
+    write_cmds = ssd1306.SSD1306.write_cmds
+    write_window = ssd1306.SSD1306.write_window
+
+
+def _report(name, i2c, frames):
+    print(f"{name}: {i2c.transactions/frames:.1f} transactions/frame, {i2c.bytes_on_bus/frames:.1f} bytes/frame, {i2c.bus_time_us()/frames:.0f} us/frame @ {i2c.freq//1000} kHz")
+
+
+def display_bus(frames=100):
+    '''
+    transactions and bytes on the bus for `frames` calls to show() and contrast()
+    '''
+    for freq in (ssd1306.I2C_FREQ_FAST, ssd1306.I2C_FREQ_FAST_PLUS):
+        for name, display_class, double_buffer, unchanged_frames in (
+            ("unbatched", UnbatchedSSD1306_I2C, False, False),
+            ("batched", ssd1306.SSD1306_I2C, False, False),
+            ("double buffered", ssd1306.SSD1306_I2C, True, False),
+            # report_full often redraws the same status, those frames never reach the bus
+            ("double buffered, every other frame unchanged", ssd1306.SSD1306_I2C, True, True),
+        ):
+            i2c = RecordingI2C(freq)
+            display = display_class(128, 64, i2c, double_buffer=double_buffer)
+            display.wait()
+            i2c.reset()
+
+            start = time.ticks_us()
+            for frame in range(frames):
+                if not unchanged_frames or frame % 2:
+                    display.fill(0)
+                    display.text(f"frame {frame}", 0, 0, 1)
+                display.show()
+                display.contrast(0xFF)
+            display.wait()
+            elapsed = time.ticks_diff(time.ticks_us(), start)
+
+            _report(name, i2c, frames)
+            print(f"    cpu: {elapsed/frames:.0f} us/frame")
+
+    # all these displays shared the one background transmitter, free the second core again
+    ssd1306.stop_transmitter()
+
+
+def _noisy_replay(pattern, flip_probability):
+    '''
+    the pattern as the sensor might quantize it, every sample can land one level off
+    '''
+    observed = list(pattern)
+    for n in range(len(observed)):
+        if random.random() < flip_probability:
+            observed[n] += random.choice((-1, 1))
+            observed[n] = min(max(observed[n], gesture.MuscleIntensity.NONE), gesture.MuscleIntensity.HIGH)
+    # a contraction only starts a reading when the first sample is above NONE
+    if not observed[0]:
+        observed[0] = gesture.MuscleIntensity.LOW
+    return observed
+
+
+def classifier_replay(decisions=1000, flip_probability=0.1):
+    '''
+    accuracy and decisions/sec of the exact lookup against the classifier on noisy replays
+    '''
+    movements = MOVEMENTS
+    classifier = gesture.MovementClassifier(movements)
+    exact_matches = {}
+    for ind, movement in enumerate(movements):
+        exact_matches[movement.muscle_intensities_order] = ind
+
+    random.seed(0)
+    replays = []
+    for _ in range(decisions):
+        ind = random.randint(0, len(movements) - 1)
+        replays.append((ind, _noisy_replay(movements[ind].muscle_intensities_order, flip_probability)))
+
+    for name, decide in (
+        ("exact lookup", lambda observed: exact_matches.get(tuple(observed), None)),
+        ("classifier", classifier.classify),
+    ):
+        correct = 0
+        rejected = 0
+        start = time.ticks_us()
+        for ind, observed in replays:
+            detected = decide(observed)
+            if detected is None:
+                rejected += 1
+            elif detected == ind:
+                correct += 1
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+
+        print(f"{name}: {100*correct/decisions:.1f}% correct, {100*rejected/decisions:.1f}% rejected, {100*(decisions-correct-rejected)/decisions:.1f}% wrong, {decisions*1000000/elapsed:.0f} decisions/s")
+
+
+class SimulatedFinger:
+    '''
+    finger without a servo, remembers when it was last moved
+    '''
+    MINIMUM_DEGREE = 0
+    MAXIMUM_DEGREE = 120
+    def __init__(self):
+        self._value = self.MINIMUM_DEGREE
+        self.moved_at = None
+
+    @property
+    def contraction_value(self):
+        return self._value
+
+    @contraction_value.setter
+    def contraction_value(self, value):
+        self._value = value
+        self.moved_at = time.ticks_us()
+
+    def contraction_toggle(self):
+        self.contraction_value = self.MINIMUM_DEGREE if self._value else self.MAXIMUM_DEGREE
+
+
+class SimulatedHand:
+    def __init__(self):
+        self.fingers = tuple(SimulatedFinger() for _ in range(5))
+
+
+def dispatch_latency(dispatches=1000):
+    '''
+    time from a detected movement until its fingers have moved, through the dispatch table and command queue
+    '''
+    hand = SimulatedHand()
+    movements = MOVEMENTS
+    dispatcher = actions.ActionDispatcher(hand, movements, (
+        (movements[0], actions.FingerToggle(0)),
+        (movements[1], actions.FingerPose(1, 90)),
+        (movements[2], actions.GRIP_PINCH),
+        (movements[3], actions.GRIP_FIST),
+        (movements[4], actions.Callback(lambda hand: hand.fingers[4].contraction_toggle())),
+        (movements[5], actions.Sequence((actions.GRIP_FIST, actions.GRIP_OPEN), interval_ms=0)),
+        ))
+
+    total = 0
+    worst = 0
+    for n in range(dispatches):
+        ind = n % len(movements)
+        start = time.ticks_us()
+        dispatcher.dispatch(ind)
+        dispatcher.queue.service()
+        latency = time.ticks_diff(max(f.moved_at for f in hand.fingers if f.moved_at is not None), start)
+        total += latency
+        worst = max(worst, latency)
+        for finger in hand.fingers:
+            finger.moved_at = None
+
+    print(f"dispatch to servo write: {total/dispatches:.1f} us average, {worst} us worst, {dispatcher.queue.dropped} dropped")
+
+
+def boot_time(modules=('ssd1306', 'servo', 'gesture', 'actions')):
+    '''
+    import time of the modules without hardware side effects, in whatever form they are on flash
+    run once with the .py sources and once with Tools/build_mpy.py output to compare
+    '''
+    total = 0
+    for name in modules:
+        if name in sys.modules:
+            del sys.modules[name]
+        start = time.ticks_us()
+        module = __import__(name)
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        total += elapsed
+        print(f"{getattr(module, '__file__', name)}: {elapsed} us")
+    print(f"total: {total} us")
+
+
+class _Fake:
+    '''
+    stands in for `self` so a hot path runs without its hardware
+    '''
+    def readinto(self, buf, write):
+        buf[0] = 0x12
+        buf[1] = 0x34
+
+    def readADResultRaw(self):
+        return 9000
+
+    def read_mucsle_intensity(self):
+        return 1
+
+    def duty_ns(self, ns):
+        pass
+
+    def deinit(self):
+        pass
+
+    def finish_contraction_order(self):
+        pass
+
+
+class _StubPeripheral:
+    '''
+    stands in for every machine peripheral on the unix port, its methods do nothing
+    '''
+    IN = OUT = PULL_UP = PULL_DOWN = PERIODIC = ONE_SHOT = 0
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return self._nothing
+
+    def _nothing(self, *args, **kwargs):
+        return None
+
+
+class _StubMachine:
+    Pin = SoftSPI = I2C = PWM = Timer = _StubPeripheral
+
+
+def native_calls(calls=1000):
+    '''
+    per-call cost of the pure python hot paths against their native variants
+    on the unix port a stub `machine` module lets the hardware modules import
+    '''
+    try:
+        import machine
+    except ImportError:
+        sys.modules['machine'] = _StubMachine
+    import hotpath_native
+    variants = hotpath_native.variants()
+    ssd1306.stop_transmitter()  # started by the display of muscle_sensor
+
+    fake = _Fake()
+    fake.spi = fake
+    fake._result = bytearray(2)
+    fake.ad = fake
+    fake.muscle_intensities_bounds = ((0, 1000), (1000, 8000), (8000, 10000), (10000, 40000))
+    fake.pwm = fake
+    fake.current_us = 0.0
+    fake.timer = fake
+    fake.current_time = 0
+    fake.MAXIMUM_SAMINGLING_TIME = 1000
+    fake.last_intensity = 1
+    fake.sample_in_loop = False
+    fake.MAXIMUM_NUM_INTENSITIES = 3
+
+    for cls, name, pure, native in variants:
+        if name == 'read_contraction_order':
+            arguments = (None,)  # the Timer passed to the callback
+        elif name == 'write_us':
+            arguments = (1500.0,)
+        else:
+            arguments = ()
+
+        costs = []
+        for function in (pure, native):
+            start = time.ticks_us()
+            for _ in range(calls):
+                fake.muscle_intensities_order = []  # keeps the callback sampling, never finishing
+                function(fake, *arguments)
+            costs.append(time.ticks_diff(time.ticks_us(), start) / calls)
+
+        print(f"{cls.__name__}.{name}: {costs[0]:.1f} us pure python, {costs[1]:.1f} us native")
+
+
+class SimulatedMuscle:
+    '''
+    a muscle calibrated the way MuscleSensor.calibrate_muscle_intensity_ranges does it
+    '''
+    def __init__(self, relaxed_value=3600, contracted_value=4500):
+        self.relaxed_value = relaxed_value
+        self.contracted_value = contracted_value
+        self.muscle_intensities_bounds = gesture.calibrated_intensity_bounds(relaxed_value, contracted_value)
+        self.last_sample = relaxed_value
+
+
+def _contraction(t_ms):
+    '''
+    contraction level 0..1 the simulated user holds: relaxed, a step, then a slow sine
+    '''
+    if t_ms < 1000:
+        return 0.0
+    if t_ms < 3000:
+        return 0.6
+    return 0.5 + 0.4 * math.sin(2 * math.pi * 0.5 * (t_ms - 3000) / 1000)
+
+
+def proportional_tracking(seconds=6, noise=0.05, maximum_lag_ms=400):
+    '''
+    simulated EMG driving one finger through ProportionalControl, sampled every 1ms
+    lag: shift of the finger angle against the ideal angle that fits best
+    jitter: RMS of the finger angle around its mean while the contraction is held steady
+    '''
+    random.seed(0)
+    hand = SimulatedHand()
+    muscle = SimulatedMuscle()
+    # what the user's muscle actually reads, not the intensity bounds
+    relaxed = muscle.relaxed_value
+    contracted = muscle.contracted_value
+    finger = hand.fingers[0]
+    control = proportional.ProportionalControl(hand, muscle, (0,))
+
+    ideal = []
+    angles = []
+    writes = 0
+    start = time.ticks_us()
+    for t_ms in range(seconds * 1000):
+        level = _contraction(t_ms)
+        ideal.append(level * finger.MAXIMUM_DEGREE)
+        muscle.last_sample = int(relaxed + (contracted - relaxed) * (level + random.uniform(-noise, noise)))
+        writes += control.update(t_ms)
+        angles.append(finger.contraction_value)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+
+    # compared from the step on, the relaxed start tracks perfectly at any lag
+    best_lag, best_error = 0, None
+    for lag in range(0, maximum_lag_ms, 5):
+        error = 0
+        for t_ms in range(1000 + lag, len(angles)):
+            error += abs(angles[t_ms] - ideal[t_ms - lag])
+        error /= len(angles) - 1000 - lag
+        if best_error is None or error < best_error:
+            best_lag, best_error = lag, error
+
+    held = angles[2000:3000]
+    mean = sum(held) / len(held)
+    jitter = math.sqrt(sum((angle - mean) ** 2 for angle in held) / len(held))
+
+    # a held full contraction, Tools/test_proportional_tracking.py asserts it closes the finger
+    muscle.last_sample = contracted
+    for t_ms in range(seconds * 1000, seconds * 1000 + 2000):
+        control.update(t_ms)
+    print(f"full contraction: {finger.contraction_value:.0f} of {finger.MAXIMUM_DEGREE} deg")
+
+    print(f"lag: {best_lag} ms, tracking error: {best_error:.1f} deg, jitter: {jitter:.2f} deg RMS while held")
+    print(f"{writes*1000/len(angles):.0f} updates/s, {elapsed/writes:.1f} us per update including the simulation")
@@ -0,0 +1,87 @@
+# Memory footprint report
+# on the board: open repl, `import footprint` then `footprint.report()`
+# on a host: `python3 footprint.py` from this directory, measured with tracemalloc instead of gc.mem_free()
+
+import gc
+import sys
+from gesture import Movement, MovementClassifier, MuscleIntensity
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def measure(build):
+    '''
+    bytes of heap still held after build() returns, the built object is kept alive while measuring
+    '''
+    if tracemalloc is None:
+        gc.collect()
+        before = gc.mem_free()
+        built = build()
+        gc.collect()
+        return before - gc.mem_free()
+
+    gc.collect()
+    tracemalloc.start()
+    built = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used
+
+
+# intensity orders of the hand in muscle_sensor.py, every one read at times (0, 1, 2)
+MOVEMENT_ORDERS = (
+    (MuscleIntensity.LOW, MuscleIntensity.NONE, MuscleIntensity.NONE),
+    (MuscleIntensity.LOW, MuscleIntensity.LOW, MuscleIntensity.NONE),
+    (MuscleIntensity.LOW, MuscleIntensity.NONE, MuscleIntensity.LOW),
+    (MuscleIntensity.LOW, MuscleIntensity.LOW, MuscleIntensity.LOW),
+    (MuscleIntensity.MEDIUM, MuscleIntensity.NONE, MuscleIntensity.NONE),
+    (MuscleIntensity.MEDIUM, MuscleIntensity.LOW, MuscleIntensity.NONE),
+)
+
+
+def _movement_table():
+    return tuple(Movement(order, (0, 1, 2)) for order in MOVEMENT_ORDERS)
+
+
+def _unpacked_movement_table():
+    # what the table used to hold: a tuple of ints per movement and a dict of tuples to match them
+    orders = tuple(tuple(list(order)) for order in MOVEMENT_ORDERS)  # fresh tuples, as built at boot
+    hashes = {}
+    for ind, order in enumerate(orders):
+        hashes[order] = ind
+    return orders, hashes
+
+
+def report():
+    movements = _movement_table()
+    rows = [
+        ("movement table, packed", _movement_table),
+        ("movement table, tuples + dict", _unpacked_movement_table),
+        ("classifier", lambda: MovementClassifier(movements)),
+    ]
+
+    # importing muscle_sensor moves the fingers and resets the display, so only
+    # measure a sensor when main.py has already imported it
+    muscle_sensor = sys.modules.get('muscle_sensor')
+    if muscle_sensor is not None:
+        rows.append(("muscle sensor", lambda: muscle_sensor.MuscleSensor(muscle_sensor.ad, muscle_sensor.movements)))
+    else:
+        print("muscle_sensor not imported, skipping the muscle sensor")
+
+    if tracemalloc is not None:
+        print("measured with tracemalloc, CPython objects are larger than on the board")
+
+    for name, build in rows:
+        print(f"{name}: {measure(build)} bytes")
+
+    if tracemalloc is None:
+        gc.collect()
+        print(f"free heap: {gc.mem_free()} bytes")
+
+
+if __name__ == "__main__":
+    report()
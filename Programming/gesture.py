@@ -0,0 +1,191 @@
+# Movement definitions and the classifier matching detected muscle intensities against them
+# kept free of machine imports so it runs on the board and the micropython unix port alike
+
+import math
+
+'''
+holding tuples values of upper and lower bound
+
+Listed from lowest intensity to highest intensity
+'''
+class MuscleIntensity:
+    NONE = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+def pack_intensities(muscle_intensities) -> int:
+    '''
+    packs muscle intensities 2 bits each into one int, the first intensity in the highest bits
+    a leading 1 bit marks the length so orders of different lengths never share a key
+    '''
+    key = 1
+    for level in muscle_intensities:
+        key = key << 2 | level
+    return key
+
+
+def calibrated_intensity_bounds(relaxed_value: int, contracted_value: int) -> tuple:
+    '''
+    (lower, upper) AD value bounds of every MuscleIntensity from the calibration averages
+    '''
+    divisions = contracted_value//10
+    v1 = relaxed_value + divisions*1
+    v2 = relaxed_value + divisions*4
+    v3 = relaxed_value + divisions*6
+    v4 = relaxed_value + divisions*10
+    return ((0, v1), (v1, v2), (v2, v3), (v3, v4))
+
+
+def _packed_length(key: int) -> int:
+    length = 0
+    while key > 1:
+        key >>= 2
+        length += 1
+    return length
+
+
+def unpack_intensities(key: int) -> tuple:
+    '''
+    reverse of pack_intensities
+    '''
+    muscle_intensities = []
+    while key > 1:
+        muscle_intensities.append(key & 0b11)
+        key >>= 2
+    muscle_intensities.reverse()
+    return tuple(muscle_intensities)
+
+
+class Movement:
+    '''
+    A specific muscle movement consists of a specific muscle contractions in a specific order with specific intervals between each muscle contraction. 
+
+    the order is only kept packed in `key`, see pack_intensities
+    '''
+    __slots__ = ('key',)
+    MAXIMUM_NUM_INTENSITIES = 3
+    def __init__(self, muscle_intensities: tuple[MuscleIntensity], times: tuple[int]):
+        '''
+        muscle_intensities: the values that would be read in `times` periods
+
+        OBVIOUS FACT: the MuscleIntensity at time0 must NEVER BE NONE
+        '''
+        #TODO: check muscle_intensities and times datatypes
+        if len(muscle_intensities) != len(times):
+            raise ValueError("number of adc_values given must equal number of times given")
+
+        # moving adc values and times into one list where every value is 
+        muscle_intensities_order = [0 for _ in range(times[-1]+1)]
+        for n in range(len(times)):
+            muscle_intensities_order[times[n]] = muscle_intensities[n]
+        self.key = pack_intensities(muscle_intensities_order)
+
+    @property
+    def muscle_intensities_order(self) -> tuple:
+        return unpack_intensities(self.key)
+
+
+class MovementClassifier:
+    '''
+    Scores every Movement against a detected muscle intensities order by weighted edit distance
+
+    a misquantized sample costs SUBSTITUTION_COST per intensity level it is off, a shifted or
+    missing sample costs INSERTION_DELETION_COST, so one bad sample no longer turns a valid
+    movement invalid. costs are in half intensity levels so every distance is a small int.
+    distances are turned into confidences with a softmax, an inexact match is only accepted
+    when its confidence reaches `threshold`, an exact one always is.
+
+    every decision is len(movements) * (MAXIMUM_NUM_INTENSITIES+1)^2 steps at most
+    '''
+    __slots__ = ('patterns', 'threshold', 'maximum_distance',
+                 '_previous_row', '_current_row', '_distances', 'last_confidence')
+    SUBSTITUTION_COST = 2
+    INSERTION_DELETION_COST = 3
+    UNKNOWN_INTENSITY_COST = 2  # a sample that fell outside every intensity bound
+    TEMPERATURE = 1  # lower makes the confidence drop faster as the distance grows
+
+    def __init__(self, movements: list[Movement], threshold: float=0.6, maximum_distance: int=4):
+        # the packed keys themselves, small ints that need no heap and stay in flash when frozen
+        self.patterns = tuple(movement.key for movement in movements)
+        self.threshold = threshold
+        self.maximum_distance = maximum_distance  # in half intensity levels like the costs
+
+        # preallocated rows so a decision does not allocate
+        longest = max(_packed_length(pattern) for pattern in self.patterns)
+        self._previous_row = [0] * (longest + 1)
+        self._current_row = [0] * (longest + 1)
+        self._distances = [0] * len(self.patterns)
+
+        self.last_confidence = 0.0
+
+    def distance(self, observed, key: int) -> int:
+        '''
+        weighted edit distance between the observed intensities and a packed movement pattern
+        '''
+        length = _packed_length(key)
+        previous = self._previous_row
+        current = self._current_row
+        indel = self.INSERTION_DELETION_COST
+
+        for j in range(length + 1):
+            previous[j] = j * indel
+
+        for i in range(len(observed)):
+            level = observed[i]
+            current[0] = (i + 1) * indel
+            for j in range(length):
+                if level is None:
+                    substitution = self.UNKNOWN_INTENSITY_COST
+                else:
+                    substitution = self.SUBSTITUTION_COST * abs(level - (key >> 2*(length-1-j) & 0b11))
+                best = previous[j] + substitution
+                if previous[j+1] + indel < best:
+                    best = previous[j+1] + indel
+                if current[j] + indel < best:
+                    best = current[j] + indel
+                current[j+1] = best
+            previous, current = current, previous
+
+        return previous[length]
+
+    def classify(self, observed):
+        '''
+        returns the index of the best matching movement, None if no movement is confident enough
+        the confidence of the decision is left in `last_confidence`, 0 when nothing was accepted
+        '''
+        # a registered movement read exactly is always accepted, even when similar movements
+        # are registered next to it and pull its softmax confidence under the threshold
+        if None not in observed:
+            key = pack_intensities(observed)
+            for ind, pattern in enumerate(self.patterns):
+                if pattern == key:
+                    self._score(observed)  # only for last_confidence
+                    return ind
+
+        ind = self._score(observed)
+        if self._distances[ind] > self.maximum_distance or self.last_confidence < self.threshold:
+            self.last_confidence = 0.0  # nothing was accepted, don't report the rejected score
+            return None
+        return ind
+
+    def _score(self, observed) -> int:
+        '''
+        scores every movement, returns the closest one and leaves its confidence in `last_confidence`
+        '''
+        distances = self._distances
+
+        ind = 0
+        for n, pattern in enumerate(self.patterns):
+            distances[n] = self.distance(observed, pattern)
+            if distances[n] < distances[ind]:
+                ind = n
+
+        # softmax relative to the best distance, keeps exp() away from underflow
+        total = 0.0
+        for d in distances:
+            total += math.exp((distances[ind] - d) / self.TEMPERATURE)
+        self.last_confidence = 1 / total
+        return ind
+
@@ -0,0 +1,83 @@
+# Native code variants of the hot paths
+#
+# the pure python methods of AD770X, MuscleSensor and Servo are the fallback, install() swaps
+# these in on firmware with the native emitter. build .mpy files with `-march=armv6m` (see
+# Tools/build_mpy.py) or this module fails to compile and the fallback stays in place
+
+import micropython
+
+
+@micropython.viper
+def read_ad_result(self) -> int:
+    buf = self._result
+    self.spi.readinto(buf, 0x00)
+    b = ptr8(buf)
+    return (b[0] << 8) | b[1]
+
+
+@micropython.native
+def read_mucsle_intensity(self):
+    value = self.ad.readADResultRaw()
+    intensity = None
+    ind = 0
+    for bound in self.muscle_intensities_bounds:
+        if bound[0] <= value <= bound[1]:
+            intensity = ind
+            break
+        ind += 1
+
+    self.last_sample = value
+    self.last_intensity = intensity
+    return intensity
+
+
+@micropython.native
+def servo_write_us(self, us):
+    self.current_us = us
+    self.pwm.duty_ns(int(us * 1000.0))
+
+
+@micropython.native
+def read_contraction_order(self, x):
+    if self.sample_in_loop:
+        self.muscle_intensities_order.append(self.last_intensity)
+    else:
+        self.muscle_intensities_order.append(self.read_mucsle_intensity())
+    self.current_time += self.MAXIMUM_SAMINGLING_TIME
+
+    if len(self.muscle_intensities_order) == self.MAXIMUM_NUM_INTENSITIES:
+        self.timer.deinit()
+        self.finish_contraction_order()
+
+
+# (module, class, method name, native variant) of every hot path
+HOT_PATHS = (
+    ('ad7705', 'AD770X', 'readADResult', 'read_ad_result'),
+    ('muscle_sensor', 'MuscleSensor', 'read_mucsle_intensity', 'read_mucsle_intensity'),
+    ('servo', 'Servo', 'write_us', 'servo_write_us'),
+    ('muscle_sensor', 'MuscleSensor', 'read_contraction_order', 'read_contraction_order'),
+)
+
+# the pure python methods install() replaced, so variants() still finds them afterwards
+_replaced = {}
+
+
+def variants() -> list:
+    '''
+    (class, method name, pure python method, native variant) of every hot path
+    '''
+    found = []
+    for module, cls, name, function in HOT_PATHS:
+        cls = getattr(__import__(module), cls)
+        pure = _replaced.get((cls, name), getattr(cls, name))
+        found.append((cls, name, pure, globals()[function]))
+    return found
+
+
+def install():
+    '''
+    replaces the pure python hot paths with the native variants
+    '''
+    for cls, name, pure, native in variants():
+        _replaced[(cls, name)] = pure
+        setattr(cls, name, native)
@@ -1,8 +1,14 @@
-from muscle_sensor import read_contraction_and_execute, muscle, ad
+from muscle_sensor import read_contraction_and_execute, muscle, ad, idle
 from machine import Pin, Timer
 import time
 from micropython import const
 
+try:
+    import hotpath_native
+    hotpath_native.install()
+except (ImportError, SyntaxError, ValueError):
+    pass  # firmware without the native emitter (or an .mpy for another arch) keeps the pure python hot paths
+
 FIRST_COMMAND_DELAY_TIME = const(300)
 SECOND_COMMAND_DELAY_TIME = const(1000)
 THIRD_COMMAND_DELAY_TIME = const(2000)
@@ -31,7 +37,7 @@ def main():
                     # Keep reading untill the next sequence
                     while True:
                         read_contraction_and_execute()
-                        time.sleep(1)
+                        idle(1000)
 
                 elif time.ticks_diff(time.ticks_ms(), start) <= SECOND_COMMAND_DELAY_TIME:
                     muscle.calibrate_muscle_intensity_ranges()
@@ -3,30 +3,26 @@ import time
 from machine import Timer, Pin, I2C
 from servo import Servo
 import ssd1306
+from gesture import MuscleIntensity, Movement, MovementClassifier, calibrated_intensity_bounds
+from actions import ActionDispatcher, FingerToggle, Sequence
+from proportional import ProportionalControl
   
-
-class Movement:
-    '''
-    A specific muscle movement consists of a specific muscle contractions in a specific order with specific intervals between each muscle contraction. 
-    '''
-    MAXIMUM_NUM_INTENSITIES = 3
-    def __init__(self, muscle_intensities: tuple[MuscleIntensity], times: tuple[int]):
-        '''
-        muscle_intensities: the values that would be read in `times` periods
-
-        OBVIOUS FACT: the MuscleIntensity at time0 must NEVER BE NONE
-        '''
-        #TODO: check muscle_intensities and times datatypes
-        if len(muscle_intensities) != len(times):
-            raise ValueError("number of adc_values given must equal number of times given")
-
-        # moving adc values and times into one list where every value is 
-        self.muscle_intensities_order = [0 for _ in range(times[-1]+1)]
-        for n in range(len(times)):
-            self.muscle_intensities_order[times[n]] = muscle_intensities[n]
-        self.muscle_intensities_order = tuple(self.muscle_intensities_order)
+# ssd1306.I2C_FREQ_FAST_PLUS for the faster bus when the display wires are short
+DISPLAY_I2C_FREQ = ssd1306.I2C_FREQ_FAST
+
+# binary frames on the usb serial port instead of report_full's text lines, decode them
+# with Tools/telemetry_dashboard.py. off by default, the frames garble a repl or mpremote session
+TELEMETRY_ENABLED = False
+if TELEMETRY_ENABLED:
+    import sys
+    import select
+    from telemetry import TelemetryWriter
+    _usb_poller = select.poll()
+    _usb_poller.register(sys.stdout, select.POLLOUT)
+    telemetry = TelemetryWriter(sys.stdout.buffer, poller=_usb_poller)
 
 class Finger:
+    __slots__ = ('_servo', 'movement')
     MINIMUM_DEGREE = 0
     MAXIMUM_DEGREE = 120
     def __init__(self, servo_pin: int, movement: Movement):
@@ -55,9 +51,10 @@ class Finger:
             self._servo.write(self.MAXIMUM_DEGREE)
 
 class HumanoidHand:
+    __slots__ = ('fingers', 'finger1', 'finger2', 'finger3', 'finger4', 'finger5', 'full_palm_movement')
 
-    # ssd1306 display
-    display = ssd1306.SSD1306_I2C(128, 64, I2C(1, scl=Pin(27), sda=Pin(26)))
+    # ssd1306 display, double buffered so the next report is drawn while the last one is sent
+    display = ssd1306.SSD1306_I2C(128, 64, I2C(1, scl=Pin(27), sda=Pin(26), freq=DISPLAY_I2C_FREQ), double_buffer=True)
  
     def __init__(self, fingers: tuple[Finger], full_palm_movement: Movement):
 
@@ -130,7 +127,10 @@ class MuscleSensorStatus:
         '''
         prints full report in terminal and on ssd1306 screen
         '''
-        print(f"{muscle.status}: Muscle Intensity: {muscle.muscle_intensities_order} @ time: {muscle.current_time} ", end=' \r')
+        if TELEMETRY_ENABLED:
+            cls.report_telemetry(muscle)
+        else:
+            print(f"{muscle.status}: Muscle Intensity: {muscle.muscle_intensities_order} @ time: {muscle.current_time} ", end=' \r')
         HumanoidHand.display.fill(0)
         HumanoidHand.display.text(muscle.status, 0, 0, 1)
         HumanoidHand.display.text(str(muscle.muscle_intensities_order), 0, 12, 1)
@@ -139,6 +139,26 @@ class MuscleSensorStatus:
 
         time.sleep_us(100)
 
+    _last_report_us = None
+
+    @classmethod
+    def report_telemetry(cls, muscle: MuscleSensor, detected_movement_ind: int=None):
+        '''
+        queues the current sample, state, servo positions and counters as telemetry frames
+        and sends what the usb port takes without waiting
+        '''
+        now = time.ticks_us()
+        loop_period = 0 if cls._last_report_us is None else time.ticks_diff(now, cls._last_report_us)
+        cls._last_report_us = now
+
+        telemetry.sample(now, muscle.last_sample, muscle.last_intensity)
+        telemetry.state(now, muscle.status, detected_movement_ind)
+        if muscle.status in (MuscleSensorStatus.MOVEMENT_DETECTED, MuscleSensorStatus.MOVEMENT_INVALID):
+            telemetry.features(now, muscle.muscle_intensities_order, muscle.classifier.last_confidence)
+        telemetry.servos(now, [finger._servo.read_us() for finger in humanoid_hand.fingers])
+        telemetry.counters(now, command_queue.dropped, loop_period)
+        telemetry.flush()
+
     @classmethod
     def report_status(cls, muscle: MuscleSensor):
         '''
@@ -192,32 +212,31 @@ class MuscleSensorStatus:
         time.sleep_us(100)
 
 
-'''
-holding tuples values of upper and lower bound
-
-Listed from lowest intensity to highest intensity
-'''
-class MuscleIntensity:
-    NONE = 0
-    LOW = 1
-    MEDIUM = 2
-    HIGH = 3
- 
 class MuscleSensor:
     '''
     Class to interface EMG Muscle Sensor V3
 
     the muscle measurements raw values range from 36 hundreds to 45 hundreds
     '''
-    muscle_intensities_bounds = [(0, 1000), (1000, 8000), (8000, 10000), (10000, 40000)]
+    __slots__ = ('ad', 'classifier', 'muscle_intensities_bounds', 'current_time', 'muscle_intensities_order',
+                 'last_muscle_intensities_order', '__detected_movement_ind', 'status', 'timer',
+                 'last_sample', 'last_intensity', 'relaxed_value', 'contracted_value', 'sample_in_loop')
+    DEFAULT_MUSCLE_INTENSITIES_BOUNDS = ((0, 1000), (1000, 8000), (8000, 10000), (10000, 40000))
+    DEFAULT_RELAXED_VALUE = 1000  # top of MuscleIntensity.NONE
+    DEFAULT_CONTRACTED_VALUE = 10000  # start of MuscleIntensity.HIGH
     MAXIMUM_SAMINGLING_TIME = const(1000)  # maximum muscle intensity change period is 1000ms
+    MAXIMUM_NUM_INTENSITIES = Movement.MAXIMUM_NUM_INTENSITIES
     def __init__(self, ad, movements: list[Movement]):
         self.ad = ad  # the AD7705 object
+        self.last_sample = 0
+        self.last_intensity = None
+        self.sample_in_loop = False  # set when the control loop keeps reading during a movement
+        self.muscle_intensities_bounds = MuscleSensor.DEFAULT_MUSCLE_INTENSITIES_BOUNDS
+        self.relaxed_value = MuscleSensor.DEFAULT_RELAXED_VALUE
+        self.contracted_value = MuscleSensor.DEFAULT_CONTRACTED_VALUE
 
-        # hashing the movement lists to efficiently match later ;)
-        self.muscle_movement_hashes = {}
-        for ind, movement in enumerate(movements):
-            self.muscle_movement_hashes[movement.muscle_intensities_order] = ind
+        # scores every movement so a single misquantized sample still finds its movement
+        self.classifier = MovementClassifier(movements)
 
         # helper variables to identify the muscle_intensities order
         self.current_time = 0
@@ -277,21 +296,26 @@ class MuscleSensor:
         MuscleSensorStatus.report_custom(f"Avg Contracted:", clear_display=False, line=24)
         MuscleSensorStatus.report_custom(f"{contracted_value}", ending='\n\n', clear_display=False, line=36)
 
-        divisions = contracted_value//10
-        v1 = relaxed_value + divisions*1
-        v2 = relaxed_value + divisions*4
-        v3 = relaxed_value + divisions*6
-        v4 = relaxed_value + divisions*10
-        self.muscle_intensities_bounds = [(0, v1), (v1, v2), (v2, v3), (v3, v4)]
+        self.muscle_intensities_bounds = calibrated_intensity_bounds(relaxed_value, contracted_value)
+        # the bounds reach past the strongest contraction, proportional control maps between these
+        self.relaxed_value = relaxed_value
+        self.contracted_value = contracted_value
 
     def read_mucsle_intensity(self) -> MuscleIntensity:
         '''
         reading current AD value and translating it into a muscle intensity range value
         '''
         value = self.ad.readADResultRaw()
+        intensity = None
         for ind, bound in enumerate(self.muscle_intensities_bounds):
             if bound[0] <= value <= bound[1]:
-                return ind
+                intensity = ind
+                break
+
+        # kept for telemetry
+        self.last_sample = value
+        self.last_intensity = intensity
+        return intensity
 
     def detect_muscle_contraction(self) -> bool:
         self.status = MuscleSensorStatus.PENDING_ACTIVIITY  #TODO: make while loop internal
@@ -310,26 +334,39 @@ class MuscleSensor:
         '''
         :param x: redundant variable for Timer class 
         parsing different movement patterns 
+
+        with `sample_in_loop` the control loop reads the AD7705 itself (proportional control),
+        this then only takes its latest sample so the AD7705 is never read from the interrupt
+        in the middle of a loop read. that sample is at most one loop iteration old, about
+        25ms with report_full waiting on the display, against the 1000ms sampling period
         '''
-        self.muscle_intensities_order.append(self.read_mucsle_intensity())
-        self.current_time += MuscleSensor.MAXIMUM_SAMINGLING_TIME
+        if self.sample_in_loop:
+            self.muscle_intensities_order.append(self.last_intensity)
+        else:
+            self.muscle_intensities_order.append(self.read_mucsle_intensity())
+        self.current_time += self.MAXIMUM_SAMINGLING_TIME
 
-        if len(self.muscle_intensities_order) == Movement.MAXIMUM_NUM_INTENSITIES:
+        if len(self.muscle_intensities_order) == self.MAXIMUM_NUM_INTENSITIES:
 
             self.timer.deinit()
+            self.finish_contraction_order()
 
-            self.__detected_movement_ind = self.match_detected_muscle_intensities_order()
-            if self.__detected_movement_ind != None:
-                self.status = MuscleSensorStatus.MOVEMENT_DETECTED
-            else:
-                self.status = MuscleSensorStatus.MOVEMENT_INVALID
+    def finish_contraction_order(self):
+        '''
+        matches the full muscle intensities order and sets the status accordingly
+        '''
+        self.__detected_movement_ind = self.match_detected_muscle_intensities_order()
+        if self.__detected_movement_ind != None:
+            self.status = MuscleSensorStatus.MOVEMENT_DETECTED
+        else:
+            self.status = MuscleSensorStatus.MOVEMENT_INVALID
 
     def match_detected_muscle_intensities_order(self):
         '''
         matches the newly found muscle_intensities list with the muscle intensity values we have
         And resets the variables
         '''
-        movement: Movement = self.muscle_movement_hashes.get(tuple(self.muscle_intensities_order), None)
+        movement: int = self.classifier.classify(self.muscle_intensities_order)
 
         self.last_muscle_intensities_order = self.muscle_intensities_order
         # self.muscle_intensities_order = [] // I moved to be cleared with every start (not every end) so that I can see the pattern detected at the end
@@ -391,32 +428,75 @@ print('\n')
 
 muscle = MuscleSensor(ad, movements)
 
+# what each movement does, new gestures and grips only need a line here
+dispatcher = ActionDispatcher(humanoid_hand, movements, (
+    (movements[0], FingerToggle(0)),
+    (movements[1], FingerToggle(1)),
+    (movements[2], FingerToggle(2)),
+    (movements[3], FingerToggle(3)),
+    (movements[4], FingerToggle(4)),
+    (movements[5], Sequence(tuple(FingerToggle(ind) for ind in range(5)), interval_ms=2000)),
+    ))
+command_queue = dispatcher.queue
+
+# fingers following the muscle contraction continuously, e.g. (0, 1, 2, 3, 4)
+# movements keep toggling them as well, so bind the movements of these fingers to something else
+PROPORTIONAL_FINGERS = ()
+proportional = ProportionalControl(humanoid_hand, muscle, PROPORTIONAL_FINGERS)
+muscle.sample_in_loop = bool(PROPORTIONAL_FINGERS)
+
+def service_control_loop():
+    '''
+    the non-blocking work done between sensor reads: queued commands and proportional control
+    '''
+    command_queue.service()
+    if PROPORTIONAL_FINGERS:
+        proportional.update(time.ticks_ms())
+
+def follow_contraction():
+    '''
+    one proportional control step on a fresh reading
+    '''
+    muscle.read_mucsle_intensity()
+    proportional.update(time.ticks_ms())
+
+def idle(ms: int):
+    '''
+    keeps the control loop running for `ms` milliseconds between movements
+    '''
+    command_queue.idle(ms, follow_contraction if PROPORTIONAL_FINGERS else None)
+
 def read_contraction_and_execute():
     muscle.detect_muscle_contraction()
     while muscle.status == MuscleSensorStatus.PENDING_ACTIVIITY:
         muscle.detect_muscle_contraction()
         MuscleSensorStatus.report_full(muscle)
+        service_control_loop()
 
     print()
 
     while muscle.status == MuscleSensorStatus.READ_IN_PROGRESS:
+        if muscle.sample_in_loop:
+            muscle.read_mucsle_intensity()  # picked up by the Timer callback
         MuscleSensorStatus.report_full(muscle)
+        service_control_loop()
 
     # MuscleSensorStatus.report_full(muscle)
     print()
+    if TELEMETRY_ENABLED:
+        MuscleSensorStatus.report_telemetry(muscle)  # the finished order and its confidence
 
     if muscle.status == MuscleSensorStatus.MOVEMENT_DETECTED:
         MuscleSensorStatus.report_status(muscle)
 
         detected_movement_ind = muscle.get_detected_muscle_movement()
 
-        MuscleSensorStatus.report_custom(f"Index: {detected_movement_ind}", clear_display=False, line=36)
+        MuscleSensorStatus.report_custom(f"Index: {detected_movement_ind} p={muscle.classifier.last_confidence:.2f}", clear_display=False, line=36)
 
-        if detected_movement_ind < 5:
-            humanoid_hand.fingers[detected_movement_ind].contraction_toggle()
-
-        else:
-            humanoid_hand.full_palm_toggle()
+        dispatcher.dispatch(detected_movement_ind)
+        service_control_loop()
+        if TELEMETRY_ENABLED:
+            MuscleSensorStatus.report_telemetry(muscle, detected_movement_ind)
 
     elif muscle.status == MuscleSensorStatus.MOVEMENT_INVALID:
         MuscleSensorStatus.report_status(muscle)
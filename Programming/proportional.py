@@ -0,0 +1,91 @@
+# Continuous finger control from the EMG envelope, alongside the discrete movement detection
+#
+# every update smooths the latest AD sample into an envelope, maps it between the relaxed and
+# fully contracted calibration averages onto the finger range through a curve, then moves the
+# fingers towards that angle through a deadband and a rate limit so sensor noise doesn't
+# shake the servos
+
+import time
+
+try:
+    ticks_diff = time.ticks_diff
+except AttributeError:
+    # CPython, for Tools/test_proportional_tracking.py
+    def ticks_diff(end, start):
+        return end - start
+
+
+class ProportionalControl:
+    '''
+    drives `fingers` (indices into hand.fingers) from `muscle.last_sample`
+
+    muscle: anything with `last_sample`, `relaxed_value` and `contracted_value`, the MuscleSensor normally
+    gamma: curve exponent, above 1 gives fine control of light grips, below 1 closes the hand early
+    '''
+    __slots__ = ('hand', 'muscle', 'fingers', 'period_ms', 'time_constant_ms', 'gamma', 'deadband',
+                 'maximum_rate', 'envelope', 'angles', '_last_update_ms')
+    def __init__(self, hand, muscle, fingers: tuple, period_ms: int=20, time_constant_ms: int=60,
+                 gamma: float=1.0, deadband: float=3.0, maximum_rate: float=360.0):
+        for finger in fingers:
+            if not 0 <= finger < len(hand.fingers):
+                raise ValueError(f"finger {finger} does not exist, hand has {len(hand.fingers)} fingers")
+
+        self.hand = hand
+        self.muscle = muscle
+        self.fingers = fingers
+        self.period_ms = period_ms  # 20ms is 50Hz
+        self.time_constant_ms = time_constant_ms  # envelope smoothing
+        self.gamma = gamma
+        self.deadband = deadband  # degrees the target must move before the finger follows
+        self.maximum_rate = maximum_rate  # degrees per second
+
+        self.envelope = None
+        self.angles = [hand.fingers[ind].MINIMUM_DEGREE for ind in fingers]
+        self._last_update_ms = None
+
+    def curve(self, level: float) -> float:
+        '''
+        maps the normalized envelope 0..1 onto the normalized finger angle 0..1
+        '''
+        return level ** self.gamma
+
+    def update(self, now_ms: int) -> bool:
+        '''
+        call as often as the control loop runs, acts at most once every `period_ms`
+        returns True when it acted
+        '''
+        if self._last_update_ms is None:
+            self._last_update_ms = now_ms
+            self.envelope = self.muscle.last_sample
+            return False
+
+        dt = ticks_diff(now_ms, self._last_update_ms)
+        if dt < self.period_ms:
+            return False
+        self._last_update_ms = now_ms
+
+        # exponential smoothing, weight chosen from the time passed so a late update catches up
+        sample = self.muscle.last_sample
+        self.envelope += (sample - self.envelope) * dt / (self.time_constant_ms + dt)
+
+        relaxed = self.muscle.relaxed_value
+        contracted = self.muscle.contracted_value
+        level = (self.envelope - relaxed) / (contracted - relaxed)
+        level = self.curve(min(max(level, 0.0), 1.0))
+
+        maximum_step = self.maximum_rate * dt / 1000
+        for n, ind in enumerate(self.fingers):
+            finger = self.hand.fingers[ind]
+            target = finger.MINIMUM_DEGREE + level * (finger.MAXIMUM_DEGREE - finger.MINIMUM_DEGREE)
+
+            error = target - self.angles[n]
+            if abs(error) < self.deadband:
+                continue
+            if error > maximum_step:
+                error = maximum_step
+            elif error < -maximum_step:
+                error = -maximum_step
+
+            self.angles[n] += error
+            finger.contraction_value = self.angles[n]
+        return True
@@ -3,6 +3,11 @@
 from micropython import const
 import framebuf
 
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
 
 # register definitions
 SET_CONTRAST = const(0x81)
@@ -23,20 +28,44 @@ SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
 
+# I2C control bytes
+CTRL_CMD_SINGLE = const(0x80)  # Co=1, D/C#=0: one command byte, another control byte follows
+CTRL_DATA_STREAM = const(0x40)  # Co=0, D/C#=1: every following byte is GDDRAM data
+
+# bus frequencies the SSD1306 is happy with
+I2C_FREQ_FAST = const(400000)  # fast-mode, datasheet rating
+I2C_FREQ_FAST_PLUS = const(1000000)  # fast-mode plus, works on most modules with short wires
+
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, double_buffer=False):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
+
+        x0 = 0
+        x1 = self.width - 1
+        if self.width == 64:
+            # displays with width of 64 pixels are shifted by 32
+            x0 += 32
+            x1 += 32
+        # the addressing window never changes, so it is built once and sent as one batch
+        self.window_cmds = bytes((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
+
+        # double buffering: drawing goes to `buffer`, the bus reads from `front`
+        self.front = None
+        if double_buffer:
+            self.front = bytearray(len(self.buffer))
+            self._front_sent = False
+
         self.init_display()
 
     def init_display(self):
-        for cmd in (
+        self.write_cmds(bytes((
             SET_DISP | 0x00,  # off
             # address setting
             SET_MEM_ADDR,
@@ -66,61 +95,183 @@ class SSD1306(framebuf.FrameBuffer):
             # charge pump
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            SET_DISP | 0x01,  # on
+        )))
         self.fill(0)
         self.show()
 
     def poweroff(self):
-        self.write_cmd(SET_DISP | 0x00)
+        self.wait()
+        self.write_cmds(bytes((SET_DISP | 0x00,)))
 
     def poweron(self):
-        self.write_cmd(SET_DISP | 0x01)
+        self.wait()
+        self.write_cmds(bytes((SET_DISP | 0x01,)))
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.wait()
+        self.write_cmds(bytes((SET_CONTRAST, contrast)))
 
     def invert(self, invert):
-        self.write_cmd(SET_NORM_INV | (invert & 1))
+        self.wait()
+        self.write_cmds(bytes((SET_NORM_INV | (invert & 1),)))
+
+    def write_cmds(self, cmds):
+        '''
+        sends a sequence of command bytes
+        interfaces override this to put the whole sequence in one bus transfer
+        '''
+        for cmd in cmds:
+            self.write_cmd(cmd)
+
+    def write_window(self, cmds, buf):
+        '''
+        sends the addressing commands then the frame data
+        '''
+        self.write_cmds(cmds)
+        self.write_data(buf)
 
     def show(self):
-        x0 = 0
-        x1 = self.width - 1
-        if self.width == 64:
-            # displays with width of 64 pixels are shifted by 32
-            x0 += 32
-            x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        if self.front is None:
+            self.write_window(self.window_cmds, self.buffer)
+            return
+
+        # nothing was drawn since the last frame, keep the bus free
+        if self._front_sent and self.buffer == self.front:
+            return
+
+        transmitter = _get_transmitter()
+        if transmitter is None:
+            self.front[:] = self.buffer
+            self.write_window(self.window_cmds, self.front)
+            self._front_sent = True
+        else:
+            transmitter.done.acquire()  # previous frame has left the bus
+            if transmitter.error is not None:
+                transmitter.done.release()
+                transmitter.raise_error()
+            self.front[:] = self.buffer
+            self._front_sent = True  # cleared again by the transmitter if the write fails
+            transmitter.display = self
+            transmitter.ready.release()
+
+    def wait(self):
+        '''
+        blocks until the frame handed to the background transmitter is fully sent
+        raises the bus error if sending it failed
+        '''
+        if self.front is not None and _transmitter is not None:
+            _transmitter.done.acquire()
+            _transmitter.done.release()
+            _transmitter.raise_error()
+
+
+class _Transmitter:
+    '''
+    sends the front buffer of double buffered displays from the second core,
+    one frame at a time for every display
+    a failed write is kept in `error` and raised by the next show() or wait()
+    '''
+    def __init__(self):
+        self.display = None
+        self.error = None
+        self.ready = _thread.allocate_lock()
+        self.done = _thread.allocate_lock()
+        self.ready.acquire()
+        _thread.start_new_thread(self._run, ())
+
+    def _run(self):
+        while True:
+            self.ready.acquire()
+            display = self.display
+            if display is None:
+                break  # stop_transmitter()
+            try:
+                display.write_window(display.window_cmds, display.front)
+            except Exception as e:
+                self.error = e
+                display._front_sent = False  # the panel did not get this frame
+            finally:
+                self.done.release()
+        self.done.release()
+
+    def raise_error(self):
+        error = self.error
+        if error is not None:
+            self.error = None
+            raise error
+
+
+# the RP2040 runs a single extra thread, so every display shares this one
+_transmitter = None
+
+
+def _get_transmitter():
+    global _transmitter
+    if _transmitter is None and _thread is not None:
+        _transmitter = _Transmitter()
+    return _transmitter
+
+
+def stop_transmitter():
+    '''
+    ends the background transmitter thread so the second core is free for other code
+    double buffered displays start it again on their next show()
+    '''
+    global _transmitter
+    if _transmitter is None:
+        return
+    _transmitter.done.acquire()
+    _transmitter.display = None
+    _transmitter.ready.release()
+    _transmitter.done.acquire()  # released once the thread has left its loop
+    _transmitter = None
 
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False, double_buffer=False):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
-        super().__init__(width, height, external_vcc)
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        self.window_list = None
+        super().__init__(width, height, external_vcc, double_buffer)
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def write_cmds(self, cmds):
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
+    def write_window(self, cmds, buf):
+        if cmds is not self.window_cmds:
+            super().write_window(cmds, buf)
+            return
+
+        if self.window_list is None:
+            # addressing commands with continuation bytes, ending with the data control byte,
+            # so a whole frame is a single I2C transfer
+            window = bytearray()
+            for cmd in cmds:
+                window.append(CTRL_CMD_SINGLE)
+                window.append(cmd)
+            window.append(CTRL_DATA_STREAM)
+            self.window_list = [bytes(window), None]
+
+        self.window_list[1] = buf
+        self.i2c.writevto(self.addr, self.window_list)
+
 
 class SSD1306_SPI(SSD1306):
-    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
+    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False, double_buffer=False):
         self.rate = 10 * 1024 * 1024
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
@@ -136,7 +287,7 @@ class SSD1306_SPI(SSD1306):
         self.res(0)
         time.sleep_ms(10)
         self.res(1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, double_buffer)
 
     def write_cmd(self, cmd):
         self.spi.init(baudrate=self.rate, polarity=0, phase=0)
@@ -146,6 +297,14 @@ class SSD1306_SPI(SSD1306):
         self.spi.write(bytearray([cmd]))
         self.cs(1)
 
+    def write_cmds(self, cmds):
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(cmds)
+        self.cs(1)
+
     def write_data(self, buf):
         self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
@@ -0,0 +1,189 @@
+# Framed binary telemetry over USB serial
+#
+# every frame is  A5 5A | type | payload length | payload | xor of type, length and payload
+# frames queue in a ring buffer and go out in small chunks only when the port can take them,
+# a full buffer drops the frame and counts it instead of stalling the control loop.
+# Tools/telemetry_dashboard.py decodes the stream on the host, kept free of machine imports
+# so the dashboard can reuse it
+
+import struct
+
+SYNC = b"\xa5\x5a"
+
+FRAME_SAMPLE = 0x01  # time_us, raw ad value, muscle intensity
+FRAME_FEATURES = 0x02  # time_us, muscle intensities order, classifier confidence
+FRAME_STATE = 0x03  # time_us, muscle sensor status, detected movement
+FRAME_SERVOS = 0x04  # time_us, pulse width of every finger servo in us
+FRAME_COUNTERS = 0x05  # time_us, dropped frames, dropped commands, control loop period in us
+
+FORMATS = {
+    FRAME_SAMPLE: "<IHB",
+    FRAME_FEATURES: "<IBBBB",
+    FRAME_STATE: "<IBb",
+    FRAME_SERVOS: "<IHHHHH",
+    FRAME_COUNTERS: "<IIII",
+}
+
+# MuscleSensorStatus values in the order they are numbered on the wire
+STATUSES = ("IDLE", "PENDING_ACTIVIITY", "READ_IN_PROGRESS", "MOVEMENT_DETECTED", "MOVEMENT_INVALID")
+
+SIZES = {frame_type: struct.calcsize(FORMATS[frame_type]) for frame_type in FORMATS}
+
+NO_VALUE = 0xFF  # a missing muscle intensity
+
+
+class TelemetryWriter:
+    '''
+    non-blocking framed writer, `stream` is anything with write() returning the bytes taken
+
+    on the board pass sys.stdout.buffer and a select.poll() registered for POLLOUT on
+    sys.stdout, flush() then stops as soon as the host isn't reading
+
+    POLLOUT only says the USB transmit fifo has some room, not how much, and the port has
+    no way to ask. a write larger than the free room waits for the host to take the rest,
+    so `chunk` is kept well below the fifo size: at worst flush() waits for one chunk
+    '''
+    HEADER_SIZE = 4
+    def __init__(self, stream, size: int=1024, chunk: int=16, poller=None):
+        self.stream = stream
+        self.poller = poller
+        self.chunk = chunk
+        self.buffer = bytearray(size)
+        self._view = memoryview(self.buffer)
+        self._start = 0
+        self._used = 0
+
+        # one frame is encoded here before it is copied into the ring
+        self._frame = bytearray(self.HEADER_SIZE + max(SIZES.values()) + 1)
+        self._frame[0:2] = SYNC
+        self._frame_view = memoryview(self._frame)
+
+        self.queued_frames = 0
+        self.dropped_frames = 0
+
+    def write(self, frame_type: int, *values) -> bool:
+        '''
+        queues one frame, returns False when it had to be dropped
+        '''
+        frame = self._frame
+        payload_size = SIZES[frame_type]
+        struct.pack_into(FORMATS[frame_type], frame, self.HEADER_SIZE, *values)
+        frame[2] = frame_type
+        frame[3] = payload_size
+        checksum = 0
+        for ind in range(2, self.HEADER_SIZE + payload_size):
+            checksum ^= frame[ind]
+        frame_size = self.HEADER_SIZE + payload_size + 1
+        frame[frame_size - 1] = checksum
+
+        size = len(self.buffer)
+        if self._used + frame_size > size:
+            self.dropped_frames += 1
+            return False
+
+        end = (self._start + self._used) % size
+        first = min(frame_size, size - end)
+        self._view[end:end+first] = self._frame_view[0:first]
+        if first < frame_size:
+            # wraps around the end of the ring
+            self._view[0:frame_size-first] = self._frame_view[first:frame_size]
+        self._used += frame_size
+        self.queued_frames += 1
+        return True
+
+    @property
+    def pending(self) -> int:
+        '''
+        bytes queued but not sent yet
+        '''
+        return self._used
+
+    def flush(self) -> int:
+        '''
+        sends what the port takes right now, returns the bytes sent
+        '''
+        sent = 0
+        while self._used:
+            if self.poller is not None and not self.poller.poll(0):
+                break
+
+            size = min(self._used, self.chunk, len(self.buffer) - self._start)
+            written = self.stream.write(self._view[self._start:self._start+size])
+            if not written:
+                break
+
+            self._start = (self._start + written) % len(self.buffer)
+            self._used -= written
+            sent += written
+        return sent
+
+    def sample(self, time_us: int, raw: int, intensity):
+        self.write(FRAME_SAMPLE, time_us & 0xFFFFFFFF, raw, NO_VALUE if intensity is None else intensity)
+
+    def features(self, time_us: int, muscle_intensities_order, confidence: float):
+        levels = [NO_VALUE, NO_VALUE, NO_VALUE]
+        for ind in range(min(len(muscle_intensities_order), 3)):
+            if muscle_intensities_order[ind] is not None:
+                levels[ind] = muscle_intensities_order[ind]
+        self.write(FRAME_FEATURES, time_us & 0xFFFFFFFF, levels[0], levels[1], levels[2], int(confidence * 255))
+
+    def state(self, time_us: int, status: str, detected_movement):
+        self.write(FRAME_STATE, time_us & 0xFFFFFFFF, STATUSES.index(status), -1 if detected_movement is None else detected_movement)
+
+    def servos(self, time_us: int, pulse_widths_us):
+        self.write(FRAME_SERVOS, time_us & 0xFFFFFFFF, *[min(int(us), 0xFFFF) for us in pulse_widths_us])
+
+    def counters(self, time_us: int, dropped_commands: int, loop_period_us: int):
+        self.write(FRAME_COUNTERS, time_us & 0xFFFFFFFF, self.dropped_frames, dropped_commands, loop_period_us)
+
+
+class FrameDecoder:
+    '''
+    turns a byte stream back into (frame type, values) tuples
+    bytes that aren't part of a valid frame, like print() output on the same port, are skipped
+    '''
+    def __init__(self):
+        self.pending = bytearray()
+        self.frames = 0
+        self.corrupted = 0
+
+    def feed(self, data) -> list:
+        self.pending.extend(data)
+        decoded = []
+        pending = self.pending
+        ind = 0
+        while True:
+            ind = pending.find(SYNC, ind)
+            if ind < 0 or len(pending) < ind + 4:
+                break
+
+            frame_type = pending[ind+2]
+            payload_size = pending[ind+3]
+            if frame_type not in FORMATS or SIZES[frame_type] != payload_size:
+                self.corrupted += 1
+                ind += 1
+                continue
+
+            frame_end = ind + 4 + payload_size + 1
+            if len(pending) < frame_end:
+                break
+
+            checksum = 0
+            for byte in pending[ind+2:frame_end-1]:
+                checksum ^= byte
+            if checksum != pending[frame_end-1]:
+                self.corrupted += 1
+                ind += 1
+                continue
+
+            decoded.append((frame_type, struct.unpack_from(FORMATS[frame_type], pending, ind + 4)))
+            self.frames += 1
+            ind = frame_end
+
+        # keep a possible partial frame, drop everything before it
+        if ind < 0:
+            keep = 1 if pending[-1:] == SYNC[:1] else 0
+            del pending[:len(pending)-keep]
+        else:
+            del pending[:ind]
+        return decoded
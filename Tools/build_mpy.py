@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+'''
+Compiles Programming/ into .mpy files for the board, optionally as a manifest for frozen modules
+
+    pip install mpy-cross
+    python3 Tools/build_mpy.py                 # Programming/*.py -> build/*.mpy
+    python3 Tools/build_mpy.py --freeze        # also write build/manifest.py
+
+main.py stays a .py file, the board only runs main.py from source. copy build/ onto the board
+with mpremote (`mpremote cp build/*.mpy :`) and delete the matching .py files from it.
+
+to freeze, build the firmware with `make BOARD=RPI_PICO FROZEN_MANIFEST=<path>/build/manifest.py`
+in micropython/ports/rp2, the frozen modules then load straight from flash.
+'''
+
+import argparse
+import pathlib
+import shutil
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+SOURCE = ROOT / 'Programming'
+
+# modules only used from the repl, not worth freezing into the firmware
+NOT_FROZEN = ('benchmark.py', 'footprint.py')
+
+
+def mpy_cross_command() -> list:
+    try:
+        import mpy_cross
+    except ImportError:
+        mpy_cross = None
+
+    if mpy_cross is not None:
+        return [str(mpy_cross.mpy_cross)]
+    if shutil.which('mpy-cross'):
+        return ['mpy-cross']
+    sys.exit("mpy-cross not found, `pip install mpy-cross` or put it on PATH")
+
+
+def build(out: pathlib.Path, march: str, optimize: int):
+    out.mkdir(parents=True, exist_ok=True)
+    command = mpy_cross_command()
+
+    print(f"{'module':<22}{'.py bytes':>10}{'.mpy bytes':>11}")
+    for source in sorted(SOURCE.glob('*.py')):
+        if source.name == 'main.py':
+            shutil.copy(source, out / source.name)
+            continue
+
+        target = out / (source.stem + '.mpy')
+        # the native emitter needs the target arch, without it hotpath_native can't compile
+        subprocess.run(command + [f'-march={march}', f'-O{optimize}', '-o', str(target), str(source)], check=True)
+        print(f"{source.name:<22}{source.stat().st_size:>10}{target.stat().st_size:>11}")
+
+
+def write_manifest(out: pathlib.Path):
+    manifest = ['include("$(PORT_DIR)/boards/manifest.py")']
+    for source in sorted(SOURCE.glob('*.py')):
+        if source.name != 'main.py' and source.name not in NOT_FROZEN:
+            manifest.append(f'module("{source.name}", base_path="{SOURCE}")')
+
+    (out / 'manifest.py').write_text('\n'.join(manifest) + '\n')
+    print(f"frozen module manifest: {out / 'manifest.py'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', type=pathlib.Path, default=ROOT / 'build', help="output directory")
+    parser.add_argument('--march', default='armv6m', help="native code arch, armv6m for the RP2040")
+    parser.add_argument('-O', dest='optimize', type=int, default=1, help="mpy-cross optimisation level")
+    parser.add_argument('--freeze', action='store_true', help="also write a frozen module manifest")
+    args = parser.parse_args()
+
+    build(args.out, args.march, args.optimize)
+    if args.freeze:
+        write_manifest(args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+'''
+Decodes and plots the binary telemetry the board streams over USB serial (Programming/telemetry.py)
+
+    python3 Tools/telemetry_dashboard.py /dev/ttyACM0            # live plot, needs matplotlib
+    python3 Tools/telemetry_dashboard.py /dev/ttyACM0 --no-plot  # frame rates once a second
+    python3 Tools/telemetry_dashboard.py --loopback 5            # self check over a pseudo-terminal
+
+the loopback writes synthetic frames with the board's TelemetryWriter into a pty and decodes
+them from the other end, every queued frame must come back intact. Linux only.
+'''
+
+import argparse
+import collections
+import os
+import pathlib
+import select
+import sys
+import threading
+import time
+import tty
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'Programming'))
+import telemetry  # noqa: E402
+
+# time.ticks_us() on the board wraps at 2**30
+TICKS_PERIOD = 2**30
+
+FRAME_NAMES = {
+    telemetry.FRAME_SAMPLE: "sample",
+    telemetry.FRAME_FEATURES: "features",
+    telemetry.FRAME_STATE: "state",
+    telemetry.FRAME_SERVOS: "servos",
+    telemetry.FRAME_COUNTERS: "counters",
+}
+
+
+def open_port(path: str) -> int:
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    tty.setraw(fd)
+    return fd
+
+
+class Dashboard:
+    '''
+    reads and decodes the port on its own thread, keeps the latest history for plotting
+    '''
+    def __init__(self, fd: int, history: int=2000):
+        self.fd = fd
+        self.decoder = telemetry.FrameDecoder()
+        self.counts = collections.Counter()
+        self.samples = collections.deque(maxlen=history)
+        self.servos = collections.deque(maxlen=history)
+        self.state = None
+        self.features = None
+        self.counters = None
+        self.lock = threading.Lock()
+        self.running = True
+
+    def read_forever(self):
+        while self.running:
+            readable, _, _ = select.select([self.fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.fd, 65536)
+            except (BlockingIOError, OSError):
+                continue
+            self.handle(self.decoder.feed(data))
+
+    def handle(self, frames):
+        with self.lock:
+            for frame_type, values in frames:
+                self.counts[frame_type] += 1
+                if frame_type == telemetry.FRAME_SAMPLE:
+                    self.samples.append(values)
+                elif frame_type == telemetry.FRAME_SERVOS:
+                    self.servos.append(values)
+                elif frame_type == telemetry.FRAME_STATE:
+                    self.state = values
+                elif frame_type == telemetry.FRAME_FEATURES:
+                    self.features = values
+                elif frame_type == telemetry.FRAME_COUNTERS:
+                    self.counters = values
+
+    def summary(self) -> str:
+        with self.lock:
+            rates = ', '.join(f"{FRAME_NAMES[t]} {self.counts[t]}" for t in FRAME_NAMES)
+            line = f"{rates} | corrupted {self.decoder.corrupted}"
+            if self.state is not None:
+                line += f" | {telemetry.STATUSES[self.state[1]]} movement {self.state[2]}"
+            if self.counters is not None:
+                line += f" | dropped frames {self.counters[1]} commands {self.counters[2]} loop {self.counters[3]} us"
+            self.counts.clear()
+        return line
+
+    def print_forever(self):
+        while True:
+            time.sleep(1)
+            print(self.summary())
+
+    def plot_forever(self):
+        import matplotlib.pyplot as plt
+
+        figure, (sample_axes, servo_axes) = plt.subplots(2, 1, sharex=True)
+        sample_line, = sample_axes.plot([], [])
+        sample_axes.set_ylabel("AD7705 raw")
+        servo_lines = [servo_axes.plot([], [], label=f"finger {n+1}")[0] for n in range(5)]
+        servo_axes.set_ylabel("servo pulse (us)")
+        servo_axes.set_xlabel("time (s)")
+        servo_axes.legend(loc="upper left")
+        title = figure.suptitle("")
+
+        last_summary = time.monotonic()
+        while plt.fignum_exists(figure.number):
+            with self.lock:
+                samples = list(self.samples)
+                servos = list(self.servos)
+
+            # plotted as seconds before the newest frame, so the counter wrapping doesn't matter
+            if samples:
+                newest = samples[-1][0]
+                sample_line.set_data([-((newest - values[0]) % TICKS_PERIOD) / 1e6 for values in samples],
+                                     [values[1] for values in samples])
+                sample_axes.relim()
+                sample_axes.autoscale_view()
+            if servos:
+                newest = servos[-1][0]
+                times = [-((newest - values[0]) % TICKS_PERIOD) / 1e6 for values in servos]
+                for n, line in enumerate(servo_lines):
+                    line.set_data(times, [values[n+1] for values in servos])
+                servo_axes.relim()
+                servo_axes.autoscale_view()
+
+            if time.monotonic() - last_summary >= 1:
+                title.set_text(self.summary())
+                last_summary = time.monotonic()
+            plt.pause(0.1)
+
+
+class _PtyStream:
+    '''
+    the board's usb port as seen by TelemetryWriter: takes what fits, never waits
+    '''
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def write(self, data) -> int:
+        try:
+            return os.write(self.fd, data)
+        except BlockingIOError:
+            return 0
+
+
+def loopback(seconds: float, sample_rate: int) -> bool:
+    import pty
+
+    board_fd, host_fd = pty.openpty()
+    tty.setraw(board_fd)
+    tty.setraw(host_fd)
+    os.set_blocking(board_fd, False)
+
+    dashboard = Dashboard(host_fd)
+    reader = threading.Thread(target=dashboard.read_forever, daemon=True)
+    reader.start()
+
+    writer = telemetry.TelemetryWriter(_PtyStream(board_fd))
+    # same mix of frames as the control loop, the slower frames once every 20 samples
+    period = 1 / sample_rate
+    start = time.monotonic()
+    n = 0
+    while time.monotonic() - start < seconds:
+        now_us = int((time.monotonic() - start) * 1e6)
+        writer.sample(now_us, n & 0xFFFF, n % 4)
+        if n % 20 == 0:
+            writer.state(now_us, telemetry.STATUSES[n % len(telemetry.STATUSES)], n % 6)
+            writer.features(now_us, (1, 0, n % 4), 0.75)
+            writer.servos(now_us, [544 + (n + finger) % 1856 for finger in range(5)])
+            writer.counters(now_us, 0, int(period * 1e6))
+        writer.flush()
+        n += 1
+        time.sleep(max(0, start + n * period - time.monotonic()))
+
+    while writer.flush() or writer.pending:
+        time.sleep(0.01)
+    time.sleep(0.5)
+    dashboard.running = False
+    reader.join()
+
+    decoded = dashboard.decoder.frames
+    elapsed = time.monotonic() - start
+    print(f"queued {writer.queued_frames} frames, dropped {writer.dropped_frames} on overflow")
+    print(f"decoded {decoded} frames, {dashboard.decoder.corrupted} corrupted, {n/seconds:.0f} samples/s for {elapsed:.1f} s")
+    return decoded == writer.queued_frames and dashboard.decoder.corrupted == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('port', nargs='?', help="serial port of the board, e.g. /dev/ttyACM0")
+    parser.add_argument('--no-plot', action='store_true', help="print frame rates instead of plotting")
+    parser.add_argument('--loopback', type=float, metavar='SECONDS', help="run the pseudo-terminal self check")
+    parser.add_argument('--rate', type=int, default=1000, help="loopback samples per second")
+    args = parser.parse_args()
+
+    if args.loopback is not None:
+        sys.exit(0 if loopback(args.loopback, args.rate) else 1)
+    if args.port is None:
+        parser.error("a serial port is needed unless --loopback is given")
+
+    dashboard = Dashboard(open_port(args.port))
+    threading.Thread(target=dashboard.read_forever, daemon=True).start()
+    try:
+        if args.no_plot:
+            dashboard.print_forever()
+        else:
+            dashboard.plot_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
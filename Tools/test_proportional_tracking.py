@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+'''
+Lag, jitter and range of the proportional finger control, driven by simulated noisy EMG
+
+    python3 Tools/test_proportional_tracking.py
+    python3 -m pytest Tools/test_proportional_tracking.py
+'''
+
+import math
+import pathlib
+import random
+import sys
+import unittest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'Programming'))
+import gesture  # noqa: E402
+import proportional  # noqa: E402
+
+SECONDS = 6
+MAXIMUM_LAG_MS = 150
+MAXIMUM_JITTER = 1.5  # degrees RMS
+
+
+class SimulatedFinger:
+    MINIMUM_DEGREE = 0
+    MAXIMUM_DEGREE = 120
+    def __init__(self):
+        self.contraction_value = self.MINIMUM_DEGREE
+
+
+class SimulatedHand:
+    def __init__(self):
+        self.fingers = tuple(SimulatedFinger() for _ in range(5))
+
+
+class SimulatedMuscle:
+    '''
+    a muscle calibrated the way MuscleSensor.calibrate_muscle_intensity_ranges does it
+    '''
+    def __init__(self, relaxed_value=3600, contracted_value=4500):
+        self.relaxed_value = relaxed_value
+        self.contracted_value = contracted_value
+        self.muscle_intensities_bounds = gesture.calibrated_intensity_bounds(relaxed_value, contracted_value)
+        self.last_sample = relaxed_value
+
+
+def contraction(t_ms):
+    '''
+    contraction level 0..1 the simulated user holds: relaxed, a step, then a slow sine
+    '''
+    if t_ms < 1000:
+        return 0.0
+    if t_ms < 3000:
+        return 0.6
+    return 0.5 + 0.4 * math.sin(2 * math.pi * 0.5 * (t_ms - 3000) / 1000)
+
+
+class ProportionalTrackingTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.hand = SimulatedHand()
+        self.muscle = SimulatedMuscle()
+        self.finger = self.hand.fingers[0]
+        self.control = proportional.ProportionalControl(self.hand, self.muscle, (0,))
+
+    def track(self, noise=0.05):
+        '''
+        finger angle and ideal angle of every millisecond
+        '''
+        relaxed = self.muscle.relaxed_value
+        contracted = self.muscle.contracted_value
+        ideal = []
+        angles = []
+        for t_ms in range(SECONDS * 1000):
+            level = contraction(t_ms)
+            ideal.append(level * self.finger.MAXIMUM_DEGREE)
+            self.muscle.last_sample = int(relaxed + (contracted - relaxed) * (level + random.uniform(-noise, noise)))
+            self.control.update(t_ms)
+            angles.append(self.finger.contraction_value)
+        return ideal, angles
+
+    def test_relaxed_muscle_keeps_finger_open(self):
+        ideal, angles = self.track()
+        self.assertEqual(max(angles[:1000]), self.finger.MINIMUM_DEGREE)
+
+    def test_lag(self):
+        ideal, angles = self.track()
+
+        # shift of the finger angle against the ideal angle that fits best, from the step on
+        best_lag, best_error = 0, None
+        for lag in range(0, 400, 5):
+            error = 0
+            for t_ms in range(1000 + lag, len(angles)):
+                error += abs(angles[t_ms] - ideal[t_ms - lag])
+            error /= len(angles) - 1000 - lag
+            if best_error is None or error < best_error:
+                best_lag, best_error = lag, error
+
+        self.assertLessEqual(best_lag, MAXIMUM_LAG_MS)
+        self.assertLess(best_error, self.control.deadband + 1)
+
+    def test_jitter_while_held(self):
+        ideal, angles = self.track()
+        # a second after the step, well settled, the contraction is held steady
+        held = angles[2000:3000]
+        mean = sum(held) / len(held)
+        jitter = math.sqrt(sum((angle - mean) ** 2 for angle in held) / len(held))
+
+        self.assertLess(jitter, MAXIMUM_JITTER)
+        self.assertAlmostEqual(mean, 0.6 * self.finger.MAXIMUM_DEGREE, delta=self.control.deadband)
+
+    def test_full_contraction_closes_finger(self):
+        self.muscle.last_sample = self.muscle.contracted_value
+        for t_ms in range(2000):
+            self.control.update(t_ms)
+
+        self.assertGreaterEqual(self.finger.contraction_value, self.finger.MAXIMUM_DEGREE - self.control.deadband)
+        self.assertLessEqual(self.finger.contraction_value, self.finger.MAXIMUM_DEGREE)
+
+
+if __name__ == '__main__':
+    unittest.main()
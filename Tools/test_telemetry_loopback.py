@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+'''
+End to end check of the telemetry encoder and host decoder over a Linux pseudo-terminal
+
+    python3 Tools/test_telemetry_loopback.py
+    python3 -m pytest Tools/test_telemetry_loopback.py
+'''
+
+import pathlib
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+import telemetry_dashboard  # noqa: E402
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "needs a Linux pseudo-terminal")
+class TelemetryLoopbackTest(unittest.TestCase):
+    def test_every_frame_decoded_at_1khz(self):
+        self.assertTrue(telemetry_dashboard.loopback(seconds=1, sample_rate=1000))
+
+    def test_every_frame_decoded_above_10khz(self):
+        self.assertTrue(telemetry_dashboard.loopback(seconds=1, sample_rate=12000))
+
+
+if __name__ == '__main__':
+    unittest.main()